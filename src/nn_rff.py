@@ -6,12 +6,17 @@ class rff(nn.Module):
     
     def __init__(self, input_num, rff_num, u=0, std=1, rff_B=None):  
         super().__init__()
-        if rff_B == None:
-            self.B = torch.randn(rff_num,input_num) * std + u
+        if rff_B is None:
+            B = torch.randn(rff_num,input_num) * std + u
         else:
-            self.B = rff_B
+            B = torch.as_tensor(rff_B).detach()
+        
+        # B is frozen: keep it as a (non-persistent) buffer so it follows .to(device),
+        # and fold the 2*pi scaling and transpose into a precomputed projection
+        self.register_buffer('B', B, persistent=False)
+        self.register_buffer('B2piT', (2 * torch.pi * B).T.contiguous(), persistent=False)
     
     def forward(self, x): 
-        Bv = 2 * torch.pi * torch.matmul(self.B, x.T).T
+        Bv = torch.matmul(x, self.B2piT)
         rff_layer_output = torch.concat((torch.cos(Bv) , torch.sin(Bv)), dim=1)
         return rff_layer_output
\ No newline at end of file
@@ -1,11 +1,11 @@
 import torch
-import numpy as np
 import torch.nn as nn
+import torch.nn.functional as F
 import torch.optim as optim
+import torch.distributed as dist
 from torch.optim.lr_scheduler import StepLR
+from torch.utils.checkpoint import checkpoint
 from src.nn_rff import rff
-from src.unlabeled_dataset import UnlabeledDataset
-from torch.utils.data import DataLoader
 
 ## Define the network model
 class ODE_PINN_SOFTBC(nn.Module): 
@@ -13,9 +13,11 @@ class ODE_PINN_SOFTBC(nn.Module):
     ## Initialize 
     def __init__(self, f, lb, ub, BC, lambdas,
                  n_hidden, n_layers, 
-                 set_rff=False, rff_num=25, u=0, std=1, rff_B=None):  # n, tol=0.001, max_epoch=3000, display=True
+                 set_rff=False, rff_num=25, u=0, std=1, rff_B=None, set_compile=False, use_ckpt=False, ckpt_chunk=256):  # n, tol=0.001, max_epoch=3000, display=True
         
         # f        :  y'' = f(x,y,y') tensor function acted on tensors x and y of size [ batch_size , 1 ]
+        #             must be written in torch ops: it sits inside the autograd graph of the loss
+        #             and is traced together with the network when set_compile=True (checked when Train starts)
         
         # lb , ub  :  float, lower and upper bound
         # BC       :  tuple, (type, yl, yu) 
@@ -26,16 +28,21 @@ class ODE_PINN_SOFTBC(nn.Module):
         # lambdas  :  tuple, (type, lambda_p, lambda_b1, lambda_b2) 
         # n_hidden :  width of the hidden layer
         # n_layers :  number of the layers (>=3), n_layers-2 hidden layers
+        # set_compile : bool, compile the fused derivative pass with torch.compile
+        # use_ckpt    : bool, checkpoint the second-order derivative pass during training: activations are
+        #               recomputed in backward, one chunk of ckpt_chunk collocation points at a time
         
         super().__init__()
         
         self.model_type = 'ODE_PINN_SOFTBC'
         self.f = f
         self.lb , self.ub , self.BC = lb , ub , BC
-        self.xl = torch.tensor(lb, dtype=torch.float32, requires_grad=True).view(-1,1)
-        self.xu = torch.tensor(ub, dtype=torch.float32, requires_grad=True).view(-1,1)
+        self.register_buffer('xl', torch.tensor([[lb]], dtype=torch.float32), persistent=False)
+        self.register_buffer('xu', torch.tensor([[ub]], dtype=torch.float32), persistent=False)
 
         self.train_loss , self.validate_loss , self.L2_loss = [] , [] , []
+        self._ones_cache = {}                 # grad_outputs reused across steps, keyed by (shape, device, dtype)
+        self._gen = None                      # private generator for seeded sampling, leaves the global RNG alone
         self.lambdas = lambdas
         self.n_hidden  , self.n_layers = n_hidden , n_layers
         
@@ -55,91 +62,146 @@ class ODE_PINN_SOFTBC(nn.Module):
                                         for _ in range(self.n_layers-3)] )
         self.output  =  nn.Linear(self.n_hidden, 1)
         self.fwd     =  nn.Sequential(self.input, self.hiddens, self.output)
+        self._linears = [ m for m in self.fwd.modules() if isinstance(m, nn.Linear) ]   # same parameters, flat order
         
+        # Compile the derivative pass (network + torch.func transforms) into one graph.
+        # the network itself is left eager: the BC terms differentiate it with create_graph=True,
+        # and compiled graphs do not support double backward.
+        self.set_compile , self.use_ckpt , self.ckpt_chunk = set_compile , use_ckpt , ckpt_chunk
+        if set_compile :
+            self.Derivatives = torch.compile(self.Derivatives, dynamic=False)
         
+        # the BC type is fixed, so pick its loss once instead of branching on every minibatch
+        # (BC types other than 1 and 2 are treated as type 3, as before)
+        self.ResidualLoss = getattr(self, '_residual_bc{}'.format(BC[0] if BC[0] in (1,2) else 3))
         
-    ## Construct dataloader
+        
+        
+    ## Check that f is a batched torch function (numpy / math / numba code would cut the gradient),
+    ## probed on the device the model trains on so f may close over tensors living there
+    @staticmethod
+    def check_f(f, device='cpu'):
+        x_probe = torch.zeros(2, 1, device=device, requires_grad=True)
+        try:
+            f_probe = f(x_probe, x_probe, x_probe)
+        except (RuntimeError, TypeError, ValueError) as e:
+            raise TypeError('f(x,y,y\') must be built from torch operations on [ batch_size , 1 ] tensors') from e
+        if not ( isinstance(f_probe, torch.Tensor) or type(f_probe) in (int, float) ):   # np.float64 subclasses float
+            raise TypeError('f(x,y,y\') must return a torch.Tensor, got {}'.format(type(f_probe).__name__))
+        
+        
+    ## Sample collocation points
     def sample_one_batch(self, batch_size=32, random_seed=-1):
            
+        generator = None
         if random_seed > 0:
-            torch.manual_seed(random_seed)
-        x_tensor = torch.rand(batch_size, 1, dtype=torch.float32)    
+            if self._gen is None or self._gen.device != self.xl.device:
+                self._gen = torch.Generator(device=self.xl.device)
+            generator = self._gen.manual_seed(random_seed)
+        x_tensor = torch.rand(batch_size, 1, device=self.xl.device, generator=generator)    
         x_tensor = ( self.ub - self.lb ) * x_tensor + self.lb
         x_tensor.requires_grad = True
         
         return x_tensor
     
     
-    def construct_train_dataloader(self, train_batch_size, train_sample_num =1000):
-           
-        x_tensor = torch.rand(train_sample_num, 1, dtype=torch.float32)    
-        x_tensor = ( self.ub - self.lb ) * x_tensor + self.lb
-        x_tensor.requires_grad = True
 
-        # Construct datasets and dataloader
-        dataset = UnlabeledDataset(x_tensor)
-        loader = DataLoader(dataset, batch_size=train_batch_size, shuffle=True)
-
-        return loader
-    
-
-    
     ## Forward pass function
     def forward(self, x): 
-        return self.fwd(x)
+        return self._mlp(x)
+    
+    
+    ## Flat forward over the Linear weights: same network as self.fwd, without the per-layer Module calls
+    def _mlp(self, x):
+        if self.rff_para[0] :
+            x = self.rff(x)
+        for layer in self._linears[:-1]:
+            x = torch.tanh(F.linear(x, layer.weight, layer.bias))
+        return F.linear(x, self._linears[-1].weight, self._linears[-1].bias)
     
     
+    ## Network value, first and second derivatives, computed per sample in one fused torch.func pass
+    def Derivatives(self, x):
+        y  = lambda xi : self._mlp(xi.view(1,1)).squeeze()
+        Dy = torch.func.grad_and_value(y)
+
+        def Dy_aux(xi):
+            D1y, yi = Dy(xi)
+            return D1y, (D1y, yi)
+
+        D2y_hat, (D1y_hat, y_hat) = torch.func.vmap(torch.func.grad(Dy_aux, has_aux=True))(x.squeeze(-1))
+        return y_hat.view(-1,1), D1y_hat.view(-1,1), D2y_hat.view(-1,1)
+
+
+    ## Cached tensor of ones shaped like y, used as grad_outputs
+    def _ones_like(self, y):
+        key = (y.shape, y.device, y.dtype)
+        ones = self._ones_cache.get(key)
+        if ones is None:
+            ones = torch.ones_like(y)
+            self._ones_cache[key] = ones
+        return ones
+
+
     ## Evaluate Loss
-    def ResidualLoss(self, x, y_hat):
-        D1y_hat  = torch.autograd.grad(y_hat, x,
-                                      grad_outputs=torch.ones_like(y_hat), 
-                                      create_graph=True)[0]     
+    # ResidualLoss(x) is bound at construction to the method matching the BC type,
+    # y(x) comes out of the derivative pass so the interior needs no separate forward
+    def _interior_loss(self, x):
+        if self.use_ckpt and self.training :
+            # Only the chunk inputs are kept, each chunk's activations are rebuilt during backward.
+            # Reentrant checkpoint: torch.func transforms do not support the saved-tensor hooks of the non-reentrant one.
+            x_ckpt = x.detach().requires_grad_(True)
+            chunks = [ checkpoint(self.Derivatives, xc, use_reentrant=True, preserve_rng_state=False)
+                       for xc in torch.split(x_ckpt, self.ckpt_chunk) ]
+            y_hat, D1y_hat, D2y_hat = ( torch.cat(t) for t in zip(*chunks) )
+        else :
+            y_hat, D1y_hat, D2y_hat = self.Derivatives(x)
 
-        D2y_hat = torch.autograd.grad(D1y_hat, x,
-                                      grad_outputs=torch.ones_like(D1y_hat),
-                                      create_graph=True)[0]
-        
         f_hat = self.f(x, y_hat, D1y_hat)
-        Lp = ((D2y_hat - f_hat)**2).sum()/len(x)
+        return (D2y_hat - f_hat).pow(2).mean()
+    
+    
+    # type 1 : y(lb) = yl ,  y(ub) = yu
+    def _residual_bc1(self, x):
+        # both boundary points go through the network in a single call
+        yb = self.forward(torch.cat([self.xl, self.xu], dim=0))
+        y_hat_l , y_hat_u = yb[0:1] , yb[1:2]
         
-
-                       # type 2 : y(lb) = yl ,  y'(ub) = yu
-                       # type 3 : y(lb) + y'(lb) = yl ,  y'(ub) = yu
-                       
-                       
-        if  self.BC[0] == 1 :
-            Lb1 = (self.lambdas[1] * ( self.forward(self.xl)-self.BC[1] )**2).squeeze()
-            Lb2 = (self.lambdas[2] * ( self.forward(self.xu)-self.BC[2] )**2).squeeze()
-                  
-        elif  self.BC[0] == 2 :
-            y_hat_l = self.forward(self.xl)
-            y_hat_u = self.forward(self.xu)
-            
-            D1y_hat_u = torch.autograd.grad(y_hat_u, self.xu, torch.ones_like(y_hat_u), create_graph=True)[0]
-            
-            Lb1 = (self.lambdas[1] * ( y_hat_l - self.BC[1] )**2).squeeze()
-            Lb2 = (self.lambdas[2] * ( D1y_hat_u - self.BC[2] )**2).squeeze()
-            
-        else:
-            y_hat_l = self.forward(self.xl)
-            y_hat_u = self.forward(self.xu)
-            
-            D1y_hat_l = torch.autograd.grad(y_hat_l, self.xl, torch.ones_like(y_hat_l), create_graph=True)[0]
-            D1y_hat_u = torch.autograd.grad(y_hat_u, self.xu, torch.ones_like(y_hat_u), create_graph=True)[0]
-            
-            Lb1 = (self.lambdas[1] * ( y_hat_l +  D1y_hat_l - self.BC[1] )**2).squeeze()
-            Lb2 = (self.lambdas[2] * ( D1y_hat_u - self.BC[2] )**2).squeeze()
+        Lb1 = self.lambdas[1] * (y_hat_l-self.BC[1]).pow(2).sum()
+        Lb2 = self.lambdas[2] * (y_hat_u-self.BC[2]).pow(2).sum()
+        return self._interior_loss(x) + Lb1 + Lb2
+    
+    
+    # type 2 : y(lb) = yl ,  y'(ub) = yu
+    def _residual_bc2(self, x):
+        xb = torch.cat([self.xl, self.xu], dim=0).requires_grad_(True)
+        yb = self.forward(xb)
+        D1yb = torch.autograd.grad(yb, xb, self._ones_like(yb), create_graph=True)[0]
+        y_hat_l , D1y_hat_u = yb[0:1] , D1yb[1:2]
+        
+        Lb1 = self.lambdas[1] * (y_hat_l - self.BC[1]).pow(2).sum()
+        Lb2 = self.lambdas[2] * (D1y_hat_u - self.BC[2]).pow(2).sum()
+        return self._interior_loss(x) + Lb1 + Lb2
+    
+    
+    # type 3 : y(lb) + y'(lb) = yl ,  y'(ub) = yu
+    def _residual_bc3(self, x):
+        xb = torch.cat([self.xl, self.xu], dim=0).requires_grad_(True)
+        yb = self.forward(xb)
+        D1yb = torch.autograd.grad(yb, xb, self._ones_like(yb), create_graph=True)[0]
+        y_hat_l , D1y_hat_l , D1y_hat_u = yb[0:1] , D1yb[0:1] , D1yb[1:2]
         
-        return Lp + Lb1 + Lb2
+        Lb1 = self.lambdas[1] * (y_hat_l +  D1y_hat_l - self.BC[1]).pow(2).sum()
+        Lb2 = self.lambdas[2] * (D1y_hat_u - self.BC[2]).pow(2).sum()
+        return self._interior_loss(x) + Lb1 + Lb2
     
     
     def L2_error(self, true_sol):
         self.eval()
-        x = torch.linspace(self.lb,self.ub,2000)
-        y_hat  = self.forward(x.view(-1,1))
-        y_true = true_sol(x.view(-1,1))
-        z = ((y_true - y_hat)**2).squeeze()
-        res = torch.trapz(z, x)
+        with torch.no_grad():
+            x = torch.linspace(self.lb, self.ub, 2000, device=self.xl.device).view(-1,1)
+            z = ((true_sol(x) - self.forward(x))**2).squeeze()
+            res = torch.trapezoid(z, x.squeeze())
         return (res.item())**0.5
     
     
@@ -147,24 +209,104 @@ class ODE_PINN_SOFTBC(nn.Module):
     
     ## Validation function
     def Validate(self, sample_num, random_seed=-1):
+        return self._validate_loss(self.sample_one_batch(sample_num, random_seed)).item()
+    
+    
+    def _validate_loss(self, x):
         self.eval()
-        x = self.sample_one_batch(sample_num, random_seed)
-        y_hat = self.forward(x) 
-        loss = self.ResidualLoss(x, y_hat)
-        return loss.item()
+        loss = self.ResidualLoss(x)
+        return loss.detach()
+    
+    
+    
+    ## Average the gradients over all ranks, one all-reduce on a flat buffer (the network is small)
+    def _allreduce_grads(self):
+        grads = [ p.grad for p in self.parameters() if p.grad is not None ]
+        flat_grads = torch.cat([ g.view(-1) for g in grads ])
+        dist.all_reduce(flat_grads)
+        flat_grads /= dist.get_world_size()
+        offset = 0
+        for g in grads:
+            g.copy_(flat_grads[offset:offset+g.numel()].view_as(g))
+            offset += g.numel()
     
     
     
     ## Training function
     def Train(self, train_num, train_batch_size, learning_rate, 
               lr_step_size=100, min_lr =5e-4, lr_gamma=0.5,
-              abs_tolerance=1e-4, max_epoch=3000, compute_L2_loss=False, true_sol=None, display=True): 
+              abs_tolerance=1e-4, max_epoch=3000, compute_L2_loss=False, true_sol=None, display=True, 
+              use_amp=False, validate_every=1, distributed=False, cuda_graph=False): 
+        
+        # use_amp  :  bool, run forward and residual under bf16 autocast (parameters and BC points stay fp32)
+        # validate_every : int, validate every k epochs (and at the last epoch) on a fixed validation set
+        #                  sampled once per Train call, the 26-point convergence window counts validations
+        # distributed : bool, data-parallel training over an initialized torch.distributed process group
+        #               (e.g. launched with torchrun). Each rank trains on train_num/world_size points with
+        #               train_batch_size per step, gradients and losses are averaged over ranks.
+        # cuda_graph : bool, capture forward + backward + optimizer step once as a CUDA graph and replay it
+        #              every step (CUDA only, not with distributed). Every step uses a full batch, so the last
+        #              train_num % train_batch_size points of each shuffle are skipped, and the three
+        #              warmup steps needed before capture are extra updates on the first minibatches.
         
+        if validate_every < 1 :
+            raise ValueError('validate_every must be a positive number of epochs, got {}'.format(validate_every))
+        if cuda_graph and ( distributed or self.xl.device.type != 'cuda' or train_num < train_batch_size ) :
+            raise ValueError('cuda_graph needs a CUDA model, distributed=False and train_num >= train_batch_size')
         
-        train_dataloader = self.construct_train_dataloader(train_batch_size, train_num)
-        n_train_batches = len(train_dataloader)
-        optimizer = optim.Adam(self.parameters(), lr=learning_rate)             # optimizer, adam optimizer
+        if distributed :
+            world_size , rank = dist.get_world_size() , dist.get_rank()
+            for t in list(self.parameters()) + list(self.buffers()):
+                dist.broadcast(t.data, src=0)                                   # start every rank from rank 0's weights and
+                                                                                # buffers (e.g. a randomly drawn rff.B)
+            train_num = -(-train_num // world_size)                             # collocation points per rank
+            display = display and rank == 0
+        
+        # pre-sample all collocation points on the model device, minibatches are views of one tensor
+        if distributed :
+            x_train = self.sample_one_batch(world_size*train_num).detach()
+            dist.broadcast(x_train, src=0)                                      # rank 0's points, split into disjoint shards
+            x_train = x_train.view(world_size, train_num, 1)[rank]
+        else :
+            x_train = self.sample_one_batch(train_num).detach()
+        self.check_f(self.f, x_train.device)
+        n_train_batches = train_num // train_batch_size if cuda_graph else -(-train_num // train_batch_size)
+        on_cuda = x_train.is_cuda                                               # single-kernel adam step: fused on GPU, foreach on CPU
+        if cuda_graph :                                                         # lr kept as a device tensor so StepLR can update a captured step
+            learning_rate = torch.tensor(learning_rate, device=x_train.device)
+        optimizer = optim.Adam(self.parameters(), lr=learning_rate, capturable=cuda_graph,
+                               fused=on_cuda, foreach=not on_cuda)              # optimizer, adam optimizer
         scheduler = StepLR(optimizer, step_size=lr_step_size, gamma=lr_gamma)   # learning updater
+        x_validate = self.sample_one_batch(round(train_num/3)).detach()         # fixed validation points
+        validate_ring = torch.empty(26, device=x_train.device)                  # last 26 validate losses, kept on device
+        n_validate = 0
+        
+        def forward_loss(x):
+            # the autocast weight cache cannot be used while capturing a CUDA graph
+            with torch.autocast(device_type=x.device.type, dtype=torch.bfloat16, enabled=use_amp, cache_enabled=not cuda_graph):
+                return self.ResidualLoss(x)            # evaluate loss
+        
+        if cuda_graph :
+            self.train()
+            x_static = x_train[:train_batch_size].clone()                       # graph input, refilled in place every step
+            
+            # warm up on a side stream (fills the caches, builds optimizer state), then capture
+            side_stream = torch.cuda.Stream()
+            side_stream.wait_stream(torch.cuda.current_stream())
+            with torch.cuda.stream(side_stream):
+                for k in range(3):
+                    x_static.copy_(x_train[(k % n_train_batches)*train_batch_size:][:train_batch_size])
+                    optimizer.zero_grad(set_to_none=True)
+                    forward_loss(x_static).backward()
+                    optimizer.step()
+            torch.cuda.current_stream().wait_stream(side_stream)
+            
+            graph = torch.cuda.CUDAGraph()
+            optimizer.zero_grad(set_to_none=True)                               # backward in the graph writes fresh grads
+            with torch.cuda.graph(graph):
+                loss_static = forward_loss(x_static)
+                loss_static.backward()
+                optimizer.step()
         
         for epoch in range(max_epoch): # training starts
             
@@ -172,18 +314,26 @@ class ODE_PINN_SOFTBC(nn.Module):
                 print('------------------------------------------------------- ')
                 print('-------------------- Epoch [{}/{}] -------------------- '.format(epoch + 1, max_epoch))
             
-            self.train() ; train_loss = 0
+            self.train() ; train_loss = torch.zeros((), device=x_train.device)
 
-            for i, x in enumerate(train_dataloader):
+            x_perm = x_train[torch.randperm(train_num, device=x_train.device)]
+            for i, start in enumerate(range(0, n_train_batches*train_batch_size, train_batch_size)):
+                x = x_perm[start:start+train_batch_size]
                 
-                # forward calculation
-                # x = self.sample_one_batch(batch_size=train_batch_size)
-                y_hat = self.forward(x)   
-                loss = self.ResidualLoss(x, y_hat)         # evaluate loss
-                optimizer.zero_grad()                      # clear gradients
-                loss.backward()                            # back propgation
-                optimizer.step()                           # update parameters
-                train_loss += loss.item()                  # compute the total loss for all batches in train set
+                if cuda_graph :
+                    x_static.copy_(x)
+                    graph.replay()                         # forward, back propagation and update in one launch
+                    loss = loss_static
+                else :
+                    # forward calculation
+                    # x = self.sample_one_batch(batch_size=train_batch_size)
+                    loss = forward_loss(x)
+                    optimizer.zero_grad(set_to_none=True)      # clear gradients
+                    loss.backward()                            # back propgation
+                    if distributed :
+                        self._allreduce_grads()                # average gradients over ranks
+                    optimizer.step()                           # update parameters
+                train_loss += loss.detach()                # compute the total loss for all batches in train set, no host sync
                 
                 # Display the training progress
                 if display :
@@ -192,9 +342,26 @@ class ODE_PINN_SOFTBC(nn.Module):
                             epoch + 1, max_epoch, i + 1, n_train_batches, loss.item()) ) # train sample loss
             
             # Validate the model
-            validate_num = round(train_num/3)
-            self.validate_loss.append(self.Validate(validate_num))    # record average validate sample loss for each epoch    
-            self.train_loss.append(train_loss/n_train_batches)        # record average train sample loss for each epoch    
+            train_loss = train_loss.float()/n_train_batches
+            if distributed :
+                dist.all_reduce(train_loss) ; train_loss /= world_size
+            validate_loss , stalled = float('nan') , False
+            if (epoch + 1) % validate_every == 0 or epoch + 1 == max_epoch :
+                n_validate += 1
+                validate_loss = self._validate_loss(x_validate)
+                if distributed :                                      # every rank takes the same stopping decision
+                    dist.all_reduce(validate_loss) ; validate_loss /= world_size
+                validate_ring[(n_validate - 1) % 26] = validate_loss
+                stalled = torch.zeros((), device=validate_loss.device)
+                if n_validate > 26 :
+                    temp_validate_loss = torch.roll(validate_ring, -(n_validate % 26))     # oldest first
+                    temp_rel_validate_loss = (torch.diff(temp_validate_loss)/temp_validate_loss[1:]).abs()
+                    stalled = (temp_rel_validate_loss < 0.0001).all().to(validate_loss.dtype)
+                validate_loss, stalled, train_loss = torch.stack((validate_loss, stalled, train_loss)).tolist()   # single host sync
+                self.validate_loss.append(validate_loss)              # record average validate sample loss for each validation    
+            else :
+                train_loss = train_loss.item()
+            self.train_loss.append(train_loss)                        # record average train sample loss for each epoch    
             
             if compute_L2_loss:
                 self.L2_loss.append(self.L2_error(true_sol))
@@ -203,21 +370,23 @@ class ODE_PINN_SOFTBC(nn.Module):
                 if compute_L2_loss:
                     print( 'Epoch [{}/{}], Avg. Train Sample Loss: {:.4f}, Avg. Validate Sample Loss: {:.4f}, \
                             L2 Loss: {:.4f}'.format(
-                            epoch + 1, max_epoch, self.train_loss[-1], self.validate_loss[-1], self.L2_loss[-1]) )
+                            epoch + 1, max_epoch, self.train_loss[-1], validate_loss, self.L2_loss[-1]) )
                 else: 
                     print( 'Epoch [{}/{}], Avg. Train Sample Loss: {:.4f}, Avg. Validate Sample Loss: {:.4f}'.format(
-                            epoch + 1, max_epoch, self.train_loss[-1], self.validate_loss[-1]) )
+                            epoch + 1, max_epoch, self.train_loss[-1], validate_loss) )
             
-            if self.validate_loss[-1] < abs_tolerance :
+            if validate_loss < abs_tolerance :
                 break
-            elif len(self.validate_loss) > 26 :
-                temp_validate_loss = np.array(self.validate_loss)[-1:-27:-1]
-                temp_validate_loss_diff = np.diff(temp_validate_loss)
-                temp_rel_validate_loss = np.abs(temp_validate_loss_diff/temp_validate_loss[:25])
-                if ( temp_rel_validate_loss < 0.0001 ).sum() == 25 :
+            elif n_validate > 26 :
+                if stalled :
                     break      
             elif optimizer.param_groups[0]['lr'] > min_lr :
                 scheduler.step()                                     # update learning rate   
+                if cuda_graph and optimizer.param_groups[0]['lr'] is not learning_rate :
+                    # older torch replaces a tensor lr instead of filling it: copy the new value into the
+                    # tensor the captured step reads, and put that tensor back in the param group
+                    learning_rate.fill_(float(optimizer.param_groups[0]['lr']))
+                    optimizer.param_groups[0]['lr'] = learning_rate
                     
               
                     
@@ -225,8 +394,7 @@ class ODE_PINN_SOFTBC(nn.Module):
     def Test(self, sample_num, random_seed=-1):
         self.eval() ; 
         x = self.sample_one_batch(sample_num, random_seed)
-        y_hat = self.forward(x) 
-        loss = self.ResidualLoss(x, y_hat)       
+        loss = self.ResidualLoss(x)       
         test_loss = loss.item()    
         print( 'Test set: Avg. Test Sample Loss: {:.4f}'.format(test_loss) )
         return test_loss